@@ -1,13 +1,22 @@
-
-
 import streamlit as st
-import yfinance as yf
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
+import numpy as np
+# yfinance, plotly and the Numba kernels are imported where they're used so the first paint isn't held up by them
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-import requests
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
 import time
+import uuid
+
+from models import SymbolData
 
 st.set_page_config(
     page_title="Economic Dashboard", 
@@ -19,41 +28,88 @@ st.set_page_config(
 st.title("📈 Real-Time Economic Dashboard")
 st.markdown("---")
 
+@dataclass(frozen=True)
+class Exchange:
+    """
+    Static configuration for one stock exchange
+    """
+    indices: tuple  # (display name, symbol) pairs
+    popular_stocks: tuple
+    search_suffixes: tuple = ()  # Yahoo symbol suffixes of this exchange's listings, used to filter search results
+    status_index: str = "^GSPC"  # Index used to check whether the market is open
+
 EXCHANGES = {
-    "🇺🇸 US Markets": {
-        "indices": {
-            "S&P 500": "^GSPC",
-            "Dow Jones": "^DJI", 
-            "NASDAQ": "^IXIC",
-            "Russell 2000": "^RUT"
-        },
-        "popular_stocks": ["AAPL", "GOOGL", "MSFT", "AMZN", "TSLA", "NVDA", "META", "NFLX", "AMD", "ORCL"]
-    },
-    "🇮🇱 Israel (TASE)": {
-        "indices": {
-            "TA-125": "^TA125.TA",
-            "TA-35": "^TA35.TA",
-            "TA-90": "^TA90.TA"
-        },
-        "popular_stocks": ["TEVA.TA", "ICL.TA", "CHKP.TA", "NICE.TA", "ELCO.TA", "POLI.TA", "MZTF.TA", "ESLT.TA"]
-    },
-    "🇪🇺 Europe": {
-        "indices": {
-            "FTSE 100": "^FTSE",
-            "DAX": "^GDAXI",
-            "CAC 40": "^FCHI"
-        },
-        "popular_stocks": ["ASML.AS", "SAP.DE", "NESN.SW", "NOVN.SW", "MC.PA", "OR.PA"]
-    },
-    "🇯🇵 Japan": {
-        "indices": {
-            "Nikkei 225": "^N225",
-            "TOPIX": "^TPX"
-        },
-        "popular_stocks": ["7203.T", "6758.T", "9984.T", "9983.T", "6861.T"]
-    }
+    "🇺🇸 US Markets": Exchange(
+        indices=(
+            ("S&P 500", "^GSPC"),
+            ("Dow Jones", "^DJI"),
+            ("NASDAQ", "^IXIC"),
+            ("Russell 2000", "^RUT")
+        ),
+        popular_stocks=("AAPL", "GOOGL", "MSFT", "AMZN", "TSLA", "NVDA", "META", "NFLX", "AMD", "ORCL")
+    ),
+    "🇮🇱 Israel (TASE)": Exchange(
+        indices=(
+            ("TA-125", "^TA125.TA"),
+            ("TA-35", "^TA35.TA"),
+            ("TA-90", "^TA90.TA")
+        ),
+        popular_stocks=("TEVA.TA", "ICL.TA", "CHKP.TA", "NICE.TA", "ELCO.TA", "POLI.TA", "MZTF.TA", "ESLT.TA"),
+        search_suffixes=(".TA",),
+        status_index="^TA125.TA"
+    ),
+    "🇪🇺 Europe": Exchange(
+        indices=(
+            ("FTSE 100", "^FTSE"),
+            ("DAX", "^GDAXI"),
+            ("CAC 40", "^FCHI")
+        ),
+        popular_stocks=("ASML.AS", "SAP.DE", "NESN.SW", "NOVN.SW", "MC.PA", "OR.PA"),
+        search_suffixes=(
+            ".AS", ".AT", ".BR", ".CO", ".DE", ".F", ".HE", ".IR", ".L", ".LS",
+            ".MC", ".MI", ".OL", ".PA", ".PR", ".ST", ".SW", ".VI", ".WA"
+        )
+    ),
+    "🇯🇵 Japan": Exchange(
+        indices=(
+            ("Nikkei 225", "^N225"),
+            ("TOPIX", "^TPX")
+        ),
+        popular_stocks=("7203.T", "6758.T", "9984.T", "9983.T", "6861.T"),
+        search_suffixes=(".T",)
+    )
 }
 
+# On-disk cache shared by all app processes on this machine - survives restarts
+CACHE_DIR = Path.home() / ".stockdash_cache"
+HISTORY_CACHE_TTL = 60  # Seconds - the one freshness bound for prices, shared by every cache layer
+INFO_CACHE_TTL = 86400  # Seconds - company metadata rarely changes
+
+# Display prefixes for common currencies (others show their ISO code)
+CURRENCY_SYMBOLS = {
+    "USD": "$",
+    "EUR": "€",
+    "GBP": "£",
+    "JPY": "¥",
+    "ILS": "₪"
+}
+
+# Yahoo accepts a limited number of symbols per batched request
+DOWNLOAD_CHUNK_SIZE = 20
+
+# Longest wait for a company info lookup before showing the bare symbol
+INFO_TIMEOUT = 1.5  # Seconds
+
+@st.cache_resource(ttl=86400, max_entries=128, show_spinner=False)
+def get_ticker(symbol):
+    """
+    One shared yf.Ticker per symbol, so yfinance's per-instance caches are
+    reused across reruns. Expires daily so cached .info doesn't go stale.
+    """
+    import yfinance as yf
+    
+    return yf.Ticker(symbol)
+
 # Sidebar for user inputs
 st.sidebar.header("Dashboard Controls")
 
@@ -73,82 +129,66 @@ search_term = st.sidebar.text_input(
     placeholder="e.g., Apple, AAPL, Microsoft"
 )
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour
+def _matches_exchange(quote, exchange_key, query):
+    """
+    Check whether a search hit is a stock listed on the selected exchange.
+    A hit for exactly the typed symbol is always kept, so any listing can
+    still be added by its full symbol.
+    """
+    if quote.get('symbol') == query.upper():
+        return True
+    if quote.get('quoteType') not in ('EQUITY', 'ETF'):
+        return False
+    
+    symbol = quote.get('symbol', '')
+    suffixes = EXCHANGES[exchange_key].search_suffixes
+    if suffixes:
+        return symbol.endswith(suffixes)
+    return '.' not in symbol  # US listings carry no exchange suffix
+
+@st.cache_data(ttl=3600, show_spinner=False)  # Cache for 1 hour
 def search_stocks(query, current_exchange):
     """
-    Search for stocks based on company name or symbol
+    Search for stocks based on company name or symbol.
+    One call to Yahoo's search endpoint (a few KB) instead of a full .info
+    download per candidate symbol. Errors are raised rather than returned,
+    so a failed search isn't cached as "no results".
     """
+    import yfinance as yf
+    
     if not query or len(query) < 2:
         return []
     
-    try:
-        search_results = []
-        query_upper = query.upper().strip()
-        
-        # Handle different exchanges
-        if current_exchange == "🇮🇱 Israel (TASE)":
-            # Try with .TA suffix for Israeli stocks
-            test_symbols = [query_upper, f"{query_upper}.TA"]
-        elif current_exchange == "🇪🇺 Europe":
-            # Try common European suffixes
-            test_symbols = [query_upper, f"{query_upper}.AS", f"{query_upper}.DE", f"{query_upper}.PA"]
-        elif current_exchange == "🇯🇵 Japan":
-            # Try with .T suffix for Japanese stocks
-            test_symbols = [query_upper, f"{query_upper}.T"]
-        else:
-            # US markets - try as is
-            test_symbols = [query_upper]
-        
-        for symbol in test_symbols:
-            try:
-                ticker = yf.Ticker(symbol)
-                # Try to get basic info with timeout
-                info = ticker.info
-                
-                # Check if we got valid data
-                if info and len(info) > 3:  # Basic check for valid response
-                    long_name = info.get('longName', info.get('shortName', symbol))
-                    if long_name and long_name != symbol:
-                        search_results.append({
-                            'symbol': symbol,
-                            'name': long_name,
-                            'sector': info.get('sector', 'N/A'),
-                            'currency': info.get('currency', 'N/A')
-                        })
-                        break  # Found valid result, no need to try other variations
-                        
-            except Exception:
-                continue  # Try next symbol variation
-        
-        return search_results[:5]  # Limit to 5 results
-        
-    except Exception as e:
-        return []
+    query = query.strip()
+    quotes = yf.Search(query, max_results=10, news_count=0, timeout=3).quotes
+    
+    search_results = [
+        {
+            'symbol': quote['symbol'],
+            'name': quote.get('longname') or quote.get('shortname') or quote['symbol'],
+            'sector': quote.get('sector', 'N/A'),
+            'currency': quote.get('currency', 'N/A')
+        }
+        for quote in quotes
+        if _matches_exchange(quote, current_exchange, query)
+    ]
+    search_results.sort(key=lambda result: result['symbol'] != query.upper())  # Exact symbol first
+    
+    return search_results[:5]  # Limit to 5 results
 
-if 'current_exchange' not in st.session_state:
-    st.session_state.current_exchange = selected_exchange
+st.session_state.setdefault('current_exchange', selected_exchange)
+st.session_state.setdefault('selected_stocks', list(exchange_data.popular_stocks[:5]))
+custom_stocks = st.session_state.setdefault('custom_stocks', [])
 
 if st.session_state.current_exchange != selected_exchange:
     st.session_state.current_exchange = selected_exchange
-    st.session_state.selected_stocks = exchange_data['popular_stocks'][:5]
-
-if 'selected_stocks' not in st.session_state:
-    st.session_state.selected_stocks = exchange_data['popular_stocks'][:5]
-
-available_stocks = list(exchange_data['popular_stocks'])
-custom_stocks = getattr(st.session_state, 'custom_stocks', [])
+    st.session_state.selected_stocks = list(exchange_data.popular_stocks[:5])
 
-# Add custom stocks to available 
-for stock in custom_stocks:
-    if stock not in available_stocks:
-        available_stocks.append(stock)
+# Add custom stocks to available (dict keeps order and drops duplicates)
+available_stocks = list(dict.fromkeys(exchange_data.popular_stocks + tuple(custom_stocks)))
+available_set = set(available_stocks)  # O(1) membership checks
 
-valid_selected_stocks = []
-for stock in st.session_state.selected_stocks:
-    if stock in available_stocks:
-        valid_selected_stocks.append(stock)
-    elif stock in exchange_data['popular_stocks']:
-        valid_selected_stocks.append(stock)
+valid_selected_stocks = [stock for stock in st.session_state.selected_stocks if stock in available_set]
 
 # Update session 
 st.session_state.selected_stocks = valid_selected_stocks
@@ -157,23 +197,24 @@ st.session_state.selected_stocks = valid_selected_stocks
 if search_term:
     with st.sidebar:
         with st.spinner("Searching..."):
-            search_results = search_stocks(search_term, selected_exchange)
+            try:
+                search_results = search_stocks(search_term, selected_exchange)
+            except Exception:
+                search_results = []  # Not cached - the next rerun searches again
         
         if search_results:
             st.sidebar.write("**Search Results:**")
+            # Deterministic across processes, unlike hash() of a str
+            search_key = hashlib.blake2b(search_term.encode(), digest_size=4).hexdigest()
             for i, result in enumerate(search_results):
-                button_key = f"search_{result['symbol']}_{i}_{hash(search_term)}"
+                button_key = f"search_{result['symbol']}_{i}_{search_key}"
                 if st.sidebar.button(
                     f"{result['symbol']} - {result['name'][:25]}...", 
                     key=button_key,
                     help=f"Sector: {result['sector']}, Currency: {result['currency']}"
                 ):
-                    # Add to custom stocks list
-                    if 'custom_stocks' not in st.session_state:
-                        st.session_state.custom_stocks = []
-                    
                     # Add to available stocks if not already there
-                    if result['symbol'] not in available_stocks:
+                    if result['symbol'] not in available_set:
                         available_stocks.append(result['symbol'])
                         st.session_state.custom_stocks.append(result['symbol'])
                     
@@ -206,48 +247,62 @@ time_period = st.sidebar.selectbox(
 )
 
 # Market status indicator
-def get_market_status():
+def _status_from_last_date(last_date):
+    """
+    Describe market status from the date of the latest index data
+    """
+    today = datetime.now().date()
+    
+    # Check if last data is from today
+    if last_date == today:
+        return "🟢 Market Open"
+    elif (today - last_date).days <= 3:  # Weekend or recent holiday
+        return "🟡 Market Closed (Recent Data Available)"
+    else:
+        return "🔴 Market Closed (Stale Data)"
+
+@st.cache_data(ttl=300)  # Cache for 5 minutes - only used when no index data is loaded
+def get_market_status(exchange_key):
     """
     Check if market is currently open
     """
     try:
         # Use a major index to check market status
-        if selected_exchange == "🇺🇸 US Markets":
-            test_ticker = yf.Ticker("^GSPC")
-        elif selected_exchange == "🇮🇱 Israel (TASE)":
-            test_ticker = yf.Ticker("^TA125.TA")
-        else:
-            test_ticker = yf.Ticker("^GSPC")  # Default to S&P 500
+        test_ticker = get_ticker(EXCHANGES[exchange_key].status_index)
         
         # Get recent data
         hist = test_ticker.history(period="2d", interval="1d")
         
         if len(hist) >= 2:
-            last_date = hist.index[-1].date()
-            today = datetime.now().date()
-            
-            # Check if last data is from today
-            if last_date == today:
-                return "🟢 Market Open"
-            elif (today - last_date).days <= 3:  # Weekend or recent holiday
-                return "🟡 Market Closed (Recent Data Available)"
-            else:
-                return "🔴 Market Closed (Stale Data)"
+            return _status_from_last_date(hist.index[-1].date())
         else:
             return "🔴 No Market Data"
     except:
         return "❓ Market Status Unknown"
 
-# Display market status
-market_status = get_market_status()
-st.sidebar.markdown(f"**Market Status:** {market_status}")
+def market_status_from_indicators(exchange_key, indicators):
+    """
+    Derive market status from the already-fetched index data. Only falls
+    back to a separate Yahoo request when the status index isn't in it.
+    """
+    status_symbol = EXCHANGES[exchange_key].status_index
+    
+    for name, symbol in EXCHANGES[exchange_key].indices:
+        if symbol == status_symbol and name in indicators:
+            return _status_from_last_date(indicators[name]['last_update'].date())
+    
+    return get_market_status(exchange_key)
+
+# Market status is filled in once the index data has loaded
+market_status_placeholder = st.sidebar.empty()
 
 # Refresh controls with better error handling
 col1, col2 = st.sidebar.columns(2)
 with col1:
     if st.button("🔄 Refresh", key="refresh_button"):
-        # Clear all cached data
+        # Clear all cached data, and skip the disk and Redis copies from before now
         st.cache_data.clear()
+        st.session_state.refreshed_at = time.time()
         # Reset search term
         if 'search_term' in st.session_state:
             del st.session_state['search_term']
@@ -257,61 +312,471 @@ with col1:
 
 with col2:
     if st.button("🗑️ Clear", key="clear_button"):
-        # Clear cache and reset selections
+        # Clear every cache layer and reset selections
         st.cache_data.clear()
+        get_ticker.clear()
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)  # Parquet histories and company info
+        st.session_state.refreshed_at = time.time()
         if 'selected_stocks' in st.session_state:
-            st.session_state.selected_stocks = exchange_data['popular_stocks'][:5]
+            st.session_state.selected_stocks = list(exchange_data.popular_stocks[:5])
         if 'custom_stocks' in st.session_state:
             del st.session_state['custom_stocks']
         st.success("Cache cleared!")
         time.sleep(1)
         st.rerun()
 
+def _history_for(df, symbol):
+    """
+    Slice one symbol's history out of a _download_histories result
+    """
+    if symbol not in df.columns.get_level_values(0):
+        return pd.DataFrame()
+    
+    return df[symbol].dropna(how='all')
+
+@st.cache_resource(show_spinner=False)
+def download_lock():
+    """
+    One lock for every yf.download in the process. yf.download collects its
+    results in module-global state, so overlapping calls (stocks and indices
+    loading together, or two sessions) would overwrite each other's tickers.
+    """
+    return threading.Lock()
+
+def _download_histories(symbols, period):
+    """
+    Download history for all symbols in as few batched requests as possible.
+    Always returns (symbol, field) MultiIndex columns.
+    """
+    import yfinance as yf
+    
+    frames = []
+    for start in range(0, len(symbols), DOWNLOAD_CHUNK_SIZE):
+        chunk = symbols[start:start + DOWNLOAD_CHUNK_SIZE]
+        with download_lock():
+            df = yf.download(
+                " ".join(chunk),
+                period=period,
+                group_by='ticker',
+                threads=True,
+                auto_adjust=True,  # Same prices as Ticker.history()
+                progress=False
+            )
+        
+        if not isinstance(df.columns, pd.MultiIndex):
+            # Older yfinance versions flatten the columns for a single ticker
+            df = pd.concat({chunk[0]: df}, axis=1)
+        frames.append(df)
+    
+    return frames[0] if len(frames) == 1 else pd.concat(frames, axis=1)
+
+def _cache_path(key, suffix):
+    """
+    File in the disk cache for a key such as "history|AAPL|1mo"
+    """
+    return CACHE_DIR / f"{hashlib.md5(key.encode()).hexdigest()}{suffix}"
+
+def _is_fresh(path, ttl):
+    """
+    Check whether a disk cache file exists and is younger than ttl seconds
+    """
+    try:
+        return time.time() - path.stat().st_mtime < ttl
+    except OSError:
+        return False
+
+def _written_since(path, cutoff):
+    """
+    Check whether a disk cache file exists and was written at or after cutoff
+    """
+    try:
+        return path.stat().st_mtime >= cutoff
+    except OSError:
+        return False
+
+def _write_cache_file(path, write):
+    """
+    Write a disk cache file through a temp file + rename, so other
+    processes never read a partially written file
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        pass  # Disk cache is best-effort
+
+def _load_histories(symbols, period, cutoff):
+    """
+    Get history for every symbol. Copies written since cutoff come from the
+    Parquet disk cache; only the stale symbols are batch-downloaded and
+    written back.
+    """
+    histories = {}
+    stale = []
+    
+    for symbol in symbols:
+        path = _cache_path(f"history|{symbol}|{period}", ".parquet")
+        if _written_since(path, cutoff):
+            try:
+                histories[symbol] = pd.read_parquet(path, engine='pyarrow')
+                continue
+            except Exception:
+                pass  # Unreadable - download it again
+        stale.append(symbol)
+    
+    if stale:
+        df = _download_histories(stale, period)
+        
+        for symbol in stale:
+            hist = _history_for(df, symbol)
+            histories[symbol] = hist
+            
+            if not hist.empty:
+                _write_cache_file(
+                    _cache_path(f"history|{symbol}|{period}", ".parquet"),
+                    lambda tmp_path: hist.to_parquet(tmp_path, compression='snappy')
+                )
+    
+    return histories
+
+def _wide_frames(stock_data):
+    """
+    Align every symbol's history into one frame with (field, symbol)
+    columns, so wide['Close'] is a dates x symbols frame
+    """
+    return pd.concat({symbol: data.history for symbol, data in stock_data.items()}, axis=1).swaplevel(axis=1)
+
+def _rank_from_end(frame):
+    """
+    Number each column's valid values from the end (1 = last valid value).
+    Symbols can trade on different calendars, so wide frames contain gaps.
+    """
+    valid = frame.notna()
+    return valid.iloc[::-1].cumsum().iloc[::-1].where(valid)
+
+def _last_two_valid(frame):
+    """
+    Get the last and previous valid value of every column
+    """
+    rank = _rank_from_end(frame)
+    return frame.where(rank.eq(1)).max(), frame.where(rank.eq(2)).max()
+
+def compute_stock_stats(stock_data):
+    """
+    Compute volume and summary statistics for all stocks in one vectorized pass
+    """
+    from kernels import vol_kernel, volume_stats  # Numba is only loaded once stats are needed
+    
+    wide = _wide_frames(stock_data)  # One alignment for every field
+    closes = wide['Close']
+    volumes = wide['Volume']
+    
+    # Writable copies - the kernel signatures reject the read-only view a single symbol gives under Copy-on-Write
+    volume_30 = volume_stats(np.array(volumes, dtype=np.float64, order='C'))  # 30-day window
+    
+    stats = pd.DataFrame({
+        'Recent Volume': volume_30[:, 0],
+        '30-Day Avg Volume': volume_30[:, 1],
+        'Volume Ratio': volume_30[:, 2],
+        'High': wide['High'].max(),
+        'Low': wide['Low'].min(),
+        'Avg Volume': volumes.mean(),
+        'Volatility': vol_kernel(np.array(closes, dtype=np.float64, order='C'))
+    }, index=volumes.columns)
+    stats.index.name = 'Stock'
+    
+    return stats
+
+@st.cache_resource(ttl=60, max_entries=64, show_spinner=False)  # Cache for 1 minute
+def build_price_chart(symbol, title, currency, data_version, _x, _y):
+    """
+    Build the price chart for one stock.
+    Cached as a resource keyed on data_version rather than the (unhashed)
+    price arrays, so reruns with unchanged data reuse the same figure.
+    """
+    import plotly.graph_objects as go
+    
+    prefix = currency_prefix(currency)
+    fig = go.Figure()
+    fig.add_trace(go.Scattergl(
+        x=_x,
+        y=_y,
+        mode='lines',
+        name=f'{symbol} Close Price',
+        line=dict(width=3),
+        hovertemplate='<b>%{fullData.name}</b><br>' +
+                    'Date: %{x}<br>' +
+                    f'Price: {prefix}%{{y:.2f}}<extra></extra>'
+    ))
+    
+    fig.update_layout(
+        title=title,
+        xaxis_title="Date",
+        yaxis_title=f"Price ({prefix.strip()})",
+        height=400,
+        showlegend=False
+    )
+    
+    return fig
+
+@st.cache_resource(ttl=60, max_entries=16, show_spinner=False)  # Cache for 1 minute
+def build_price_grid(symbols, titles, currencies, data_version, _x, _closes):
+    """
+    Build one figure with a price chart per stock stacked as subplots,
+    from a (dates x symbols) close array
+    """
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    
+    rows = len(symbols)
+    prefixes = [currency_prefix(currency) for currency in currencies]
+    fig = make_subplots(rows=rows, cols=1, subplot_titles=titles, vertical_spacing=0.2 / rows)
+    fig.add_traces(
+        [
+            go.Scattergl(
+                x=_x,
+                y=_closes[:, i],
+                mode='lines',
+                name=f'{symbol} Close Price',
+                line=dict(width=3),
+                connectgaps=True,  # Bridge other exchanges' trading days
+                hovertemplate='<b>%{fullData.name}</b><br>' +
+                            'Date: %{x}<br>' +
+                            f'Price: {prefixes[i]}%{{y:.2f}}<extra></extra>'
+            )
+            for i, symbol in enumerate(symbols)
+        ],
+        rows=list(range(1, rows + 1)),
+        cols=[1] * rows
+    )
+    
+    fig.update_layout(
+        height=300 * rows,
+        showlegend=False,
+        # One price axis per subplot: yaxis, yaxis2, ...
+        **{f"yaxis{i + 1 if i else ''}_title": f"Price ({prefix.strip()})" for i, prefix in enumerate(prefixes)}
+    )
+    
+    return fig
+
+@st.cache_resource(ttl=60, max_entries=16, show_spinner=False)  # Cache for 1 minute
+def build_comparison_chart(symbols, period, data_version, _x, _normalized):
+    """
+    Build the normalized comparison chart from a (dates x symbols) array
+    """
+    import plotly.express as px
+    
+    # Long form so plotly builds all traces in a single call
+    comparison_df = (
+        pd.DataFrame(_normalized, index=pd.Index(_x, name='Date'), columns=list(symbols))
+        .reset_index()
+        .melt(id_vars='Date', var_name='Stock', value_name='Change')
+        .dropna()  # Bridge other exchanges' trading days
+    )
+    
+    fig = px.line(
+        comparison_df,
+        x='Date',
+        y='Change',
+        color='Stock',
+        render_mode='webgl',
+        title="Stock Performance Comparison (% Change from Start)",
+        labels={'Change': "Percentage Change (%)"}
+    )
+    
+    fig.update_traces(
+        line=dict(width=2),
+        hovertemplate='<b>%{fullData.name}</b><br>' +
+                    'Date: %{x}<br>' +
+                    'Change: %{y:.2f}%<extra></extra>'
+    )
+    
+    fig.update_layout(
+        height=500,
+        hovermode='x unified'
+    )
+    
+    return fig
+
+def _daily_changes(histories):
+    """
+    Latest close, change and % change vs the previous close for every
+    symbol in one vectorized pass. A symbol with a single row gets 0 change.
+    Returns three {symbol: value} dicts.
+    """
+    closes = pd.DataFrame({symbol: hist['Close'] for symbol, hist in histories.items() if not hist.empty})
+    last, previous = _last_two_valid(closes)
+    change = (last - previous).fillna(0)
+    change_pct = (change / previous.where(previous != 0) * 100).fillna(0)
+    
+    return last.to_dict(), change.to_dict(), change_pct.to_dict()
+
+@st.cache_resource(show_spinner=False)
+def info_executor():
+    """
+    Worker threads for .info lookups, so a slow scrape can be abandoned
+    """
+    return ThreadPoolExecutor(max_workers=8)
+
+@st.cache_data(ttl=86400, show_spinner=False)  # Cache for 24 hours - company metadata rarely changes
+def get_ticker_info(symbol):
+    """
+    Get company info for a symbol (slow - only fetch when rendered).
+    Kept separate from the price cache so a price refresh never re-scrapes it.
+    Raises TimeoutError if Yahoo doesn't answer within INFO_TIMEOUT, so a
+    slow lookup isn't cached and is retried on a later rerun.
+    """
+    path = _cache_path(f"info|{symbol}", ".json")
+    if _is_fresh(path, INFO_CACHE_TTL):
+        try:
+            return json.loads(path.read_text())
+        except Exception:
+            pass  # Unreadable - fetch it again
+    
+    ticker = get_ticker(symbol)
+    info = info_executor().submit(ticker.get_info).result(timeout=INFO_TIMEOUT)
+    
+    _write_cache_file(path, lambda tmp_path: tmp_path.write_text(json.dumps(info, default=str)))
+    return info
+
+def get_company_name(symbol):
+    """
+    Get the display name for a symbol, falling back to the symbol itself
+    (also when the info lookup times out)
+    """
+    try:
+        return get_ticker_info(symbol).get('longName', symbol) or symbol
+    except Exception:
+        return symbol
+
+@st.cache_data(ttl=86400, show_spinner=False)  # Cache for 24 hours
+def get_ticker_currency(symbol):
+    """
+    Get the trading currency of a symbol from fast_info, which is a small
+    metadata request instead of the full .info scrape
+    """
+    return get_ticker(symbol).fast_info.get('currency')
+
+def get_currency(symbol):
+    """
+    Get the currency code for a symbol, or None if it can't be looked up
+    """
+    try:
+        return get_ticker_currency(symbol)
+    except Exception:
+        return None
+
+def currency_prefix(currency):
+    """
+    Display prefix for a currency ($ when the currency is unknown)
+    """
+    return CURRENCY_SYMBOLS.get(currency, f"{currency} " if currency else "$")
+
+def format_price(price, currency):
+    """
+    Format a price with its currency symbol
+    """
+    return f"{currency_prefix(currency)}{price:.2f}"
+
+def lookup_concurrently(lookup, symbols):
+    """
+    Run a per-symbol lookup (e.g. get_company_name) for several symbols in parallel
+    """
+    if not symbols:
+        return {}
+    
+    with ThreadPoolExecutor(max_workers=min(8, len(symbols))) as executor:
+        return dict(zip(symbols, executor.map(lookup, symbols)))
+
+@st.cache_resource(show_spinner=False)
+def get_redis_client():
+    """
+    Shared Redis client for the cross-process cache (None if REDIS_HOST isn't set)
+    """
+    host = os.environ.get("REDIS_HOST")
+    if not host:
+        return None
+    
+    import redis  # Optional dependency - only needed when Redis is configured
+    return redis.Redis(
+        host=host,
+        port=int(os.environ.get("REDIS_PORT", 6379)),
+        socket_timeout=1
+    )
+
+def redis_cache(ttl, key_prefix):
+    """
+    Cache a function's result in Redis so all Streamlit processes share it.
+    Stack inside @st.cache_data: local hits never leave the process, and
+    a fresh process is served from Redis instead of Yahoo.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            client = get_redis_client()
+            if client is None:
+                return func(*args, **kwargs)
+            
+            raw_key = json.dumps([args, kwargs], sort_keys=True, default=str)
+            key = f"{key_prefix}:{hashlib.md5(raw_key.encode()).hexdigest()}"
+            
+            try:
+                cached = client.get(key)
+                if cached is not None:
+                    return pickle.loads(cached)
+            except Exception:
+                pass  # Redis unavailable - fall back to fetching
+            
+            result = func(*args, **kwargs)
+            
+            try:
+                client.setex(key, ttl, pickle.dumps(result))
+            except Exception:
+                pass
+            
+            return result
+        return wrapper
+    return decorator
+
 # Function to get stock data with error handling
-@st.cache_data(ttl=60)  # Cache for 1 minute
-def get_stock_data(symbols, period="1mo"):
+@st.cache_data(ttl=HISTORY_CACHE_TTL, show_spinner=False)  # Cache for 1 minute
+@redis_cache(ttl=HISTORY_CACHE_TTL, key_prefix="stocks")
+def get_stock_data(symbols, period, cutoff):
     """
-    Fetch stock data for given symbols with comprehensive error handling
+    Fetch stock data for given symbols with comprehensive error handling.
+    cutoff (see data_cutoff) keys every cache layer, so nothing older is served.
+    Returns ({symbol: SymbolData}, errors)
     """
     data = {}
     errors = []
     
+    if not symbols:
+        return data, errors
+    
+    try:
+        histories = _load_histories(symbols, period, cutoff)
+    except Exception as e:
+        return data, [f"Error downloading stock data: {str(e)}"]
+    
+    last, change, change_pct = _daily_changes(histories)
+    
     for symbol in symbols:
         try:
-            stock = yf.Ticker(symbol)
-            
-            # Get historical data
-            hist = stock.history(period=period)
+            hist = histories[symbol]
             
             if hist.empty:
                 errors.append(f"{symbol}: No historical data available")
                 continue
             
-            # Get company info (with fallback)
-            try:
-                info = stock.info
-            except:
-                info = {'longName': symbol, 'sector': 'Unknown'}
-            
-            # Calculate current price and change
-            if len(hist) >= 2:
-                current_price = hist['Close'].iloc[-1]
-                previous_price = hist['Close'].iloc[-2]
-                change = current_price - previous_price
-                change_pct = (change / previous_price) * 100 if previous_price != 0 else 0
-            else:
-                current_price = hist['Close'].iloc[-1] if not hist.empty else 0
-                change = 0
-                change_pct = 0
-            
-            data[symbol] = {
-                'history': hist,
-                'info': info,
-                'current_price': current_price,
-                'change': change,
-                'change_pct': change_pct,
-                'last_update': hist.index[-1] if not hist.empty else datetime.now()
-            }
+            data[symbol] = SymbolData(
+                history=hist,
+                current_price=last[symbol],
+                change=change[symbol],
+                change_pct=change_pct[symbol],
+                last_update=hist.index[-1]
+            )
             
         except Exception as e:
             errors.append(f"{symbol}: {str(e)}")
@@ -320,45 +785,35 @@ def get_stock_data(symbols, period="1mo"):
     return data, errors
 
 # Function to get economic indicators with error handling
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def get_economic_indicators(exchange_key):
+@st.cache_data(ttl=HISTORY_CACHE_TTL, show_spinner=False)  # Cache for 1 minute
+@redis_cache(ttl=HISTORY_CACHE_TTL, key_prefix="indices")
+def get_economic_indicators(exchange_key, cutoff):
     """
-    Get economic indicators for selected exchange
+    Get economic indicators for selected exchange, no older than cutoff
     """
     indicators = {}
     errors = []
     
     try:
-        indices = EXCHANGES[exchange_key]['indices']
+        indices = EXCHANGES[exchange_key].indices
+        histories = _load_histories([symbol for _, symbol in indices], "5d", cutoff)  # Get more days to handle weekends
         
-        for name, symbol in indices.items():
+        last, change, change_pct = _daily_changes(histories)
+        
+        for name, symbol in indices:
             try:
-                ticker = yf.Ticker(symbol)
-                hist = ticker.history(period="5d")  # Get more days to handle weekends
+                hist = histories[symbol]
                 
-                if len(hist) >= 2:
-                    current = hist['Close'].iloc[-1]
-                    previous = hist['Close'].iloc[-2]
-                    change = current - previous
-                    change_pct = (change / previous) * 100 if previous != 0 else 0
-                    
-                    indicators[name] = {
-                        'value': current,
-                        'change': change,
-                        'change_pct': change_pct,
-                        'last_update': hist.index[-1]
-                    }
-                elif len(hist) == 1:
-                    # Only one day of data
-                    current = hist['Close'].iloc[-1]
-                    indicators[name] = {
-                        'value': current,
-                        'change': 0,
-                        'change_pct': 0,
-                        'last_update': hist.index[-1]
-                    }
-                else:
+                if hist.empty:
                     errors.append(f"{name}: No data available")
+                    continue
+                
+                indicators[name] = {
+                    'value': last[symbol],
+                    'change': change[symbol],
+                    'change_pct': change_pct[symbol],
+                    'last_update': hist.index[-1]
+                }
                     
             except Exception as e:
                 errors.append(f"{name}: {str(e)}")
@@ -370,12 +825,46 @@ def get_economic_indicators(exchange_key):
     return indicators, errors
 
 # Main dashboard layout
+def data_cutoff():
+    """
+    Oldest fetch time the page may show: the start of the current
+    HISTORY_CACHE_TTL window, or the last Refresh click if that's later.
+    Every price cache layer is keyed on it, so their TTLs don't stack -
+    data is at most HISTORY_CACHE_TTL old in total.
+    """
+    window_start = time.time() // HISTORY_CACHE_TTL * HISTORY_CACHE_TTL
+    return max(window_start, st.session_state.get('refreshed_at', 0.0))
+
+@st.cache_resource(ttl=HISTORY_CACHE_TTL, max_entries=32, show_spinner=False)  # Cache for 1 minute
+def load_dashboard_data(symbols, period, exchange_key, cutoff):
+    """
+    Load everything the main page needs for one selection.
+    Reruns that don't change the selection (e.g. typing in the search box)
+    get the same objects back without re-entering the fetch path.
+    """
+    # Stocks and indices load side by side (their yf.download calls still take turns on download_lock)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        stock_future = executor.submit(get_stock_data, list(symbols), period, cutoff)
+        econ_future = executor.submit(get_economic_indicators, exchange_key, cutoff)
+        stock_data, stock_errors = stock_future.result()
+        economic_data, econ_errors = econ_future.result()
+    
+    stock_stats = compute_stock_stats(stock_data) if stock_data else None
+    
+    return stock_data, stock_errors, economic_data, econ_errors, stock_stats
+
+economic_data = {}
+
 if selected_stocks:
     
     # Get data with error handling
     with st.spinner("Loading data..."):
-        stock_data, stock_errors = get_stock_data(selected_stocks, time_period)
-        economic_data, econ_errors = get_economic_indicators(selected_exchange)
+        stock_data, stock_errors, economic_data, econ_errors, stock_stats = load_dashboard_data(
+            tuple(selected_stocks),
+            time_period,
+            selected_exchange,
+            data_cutoff()
+        )
     
     # Display any errors
     if stock_errors:
@@ -408,6 +897,10 @@ if selected_stocks:
     st.header("💰 Stock Prices")
     
     if stock_data:
+        # Look up all company names and currencies in parallel rather than one by one while rendering
+        company_names = lookup_concurrently(get_company_name, list(stock_data))
+        currencies = lookup_concurrently(get_currency, list(stock_data))
+        
         # Current prices display
         num_cols = min(len(stock_data), 5)  # Maximum 5 columns
         price_cols = st.columns(num_cols)
@@ -418,13 +911,13 @@ if selected_stocks:
             for j, (symbol, data) in enumerate(batch):
                 col_idx = j % num_cols
                 with price_cols[col_idx]:
-                    company_name = data['info'].get('longName', symbol)
+                    company_name = company_names[symbol]
                     short_name = company_name[:20] + "..." if len(company_name) > 20 else company_name
                     
                     st.metric(
                         label=f"{symbol}",
-                        value=f"${data['current_price']:.2f}" if data['current_price'] > 0 else "N/A",
-                        delta=f"{data['change_pct']:+.2f}%" if data['change_pct'] != 0 else None,
+                        value=format_price(data.current_price, currencies[symbol]) if data.current_price > 0 else "N/A",
+                        delta=f"{data.change_pct:+.2f}%" if data.change_pct != 0 else None,
                         help=short_name
                     )
         
@@ -434,63 +927,52 @@ if selected_stocks:
         # Create tabs for different views
         tab1, tab2 = st.tabs(["Individual Charts", "Comparison Chart"])
         
+        # Identifies the loaded prices, so cached figures are only rebuilt when they change
+        data_version = tuple((quote.last_update, quote.current_price) for quote in stock_data.values())
+        
         with tab1:
-            for symbol, data in stock_data.items():
-                if not data['history'].empty:
-                    hist = data['history']
-                    
-                    fig = go.Figure()
-                    fig.add_trace(go.Scatter(
-                        x=hist.index,
-                        y=hist['Close'],
-                        mode='lines',
-                        name=f'{symbol} Close Price',
-                        line=dict(width=3),
-                        hovertemplate='<b>%{fullData.name}</b><br>' +
-                                    'Date: %{x}<br>' +
-                                    'Price: $%{y:.2f}<extra></extra>'
-                    ))
-                    
-                    company_name = data['info'].get('longName', symbol)
-                    fig.update_layout(
-                        title=f"{symbol} - {company_name} ({time_period})",
-                        xaxis_title="Date",
-                        yaxis_title="Price ($)",
-                        height=400,
-                        showlegend=False
-                    )
-                    
-                    st.plotly_chart(fig, use_container_width=True)
+            # Only build the chart being looked at, unless all are requested
+            show_all = st.checkbox("Show all charts", value=False, key="show_all_charts")
+            if show_all:
+                # All stocks in one figure - one serialization and one message to the browser
+                closes = _wide_frames(stock_data)['Close']
+                fig = build_price_grid(
+                    tuple(closes.columns),
+                    tuple(f"{symbol} - {company_names[symbol]} ({time_period})" for symbol in closes.columns),
+                    tuple(currencies[symbol] for symbol in closes.columns),
+                    data_version,
+                    closes.index.to_numpy(),
+                    closes.to_numpy(dtype=np.float32)  # Display-only - halves the base64 payload
+                )
+            else:
+                symbol = st.selectbox("Stock:", list(stock_data.keys()), key="chart_symbol")
+                hist = stock_data[symbol].history
+                fig = build_price_chart(
+                    symbol,
+                    f"{symbol} - {company_names[symbol]} ({time_period})",
+                    currencies[symbol],
+                    data_version,
+                    hist.index.to_numpy(),
+                    hist['Close'].to_numpy(dtype=np.float32)  # Display-only - halves the base64 payload
+                )
+            
+            st.plotly_chart(fig, use_container_width=True)
         
         with tab2:
             # Comparison chart (normalized)
             if len(stock_data) > 1:
-                fig = go.Figure()
+                # Normalize to percentage change from each stock's first close in one matrix op
+                closes = _wide_frames(stock_data)['Close']
+                first_close = closes.bfill().iloc[0]
+                closes = closes.loc[:, first_close.ne(0)]
+                normalized = closes.div(first_close[closes.columns]).sub(1).mul(100)
                 
-                for symbol, data in stock_data.items():
-                    if not data['history'].empty:
-                        hist = data['history']
-                        # Normalize to percentage change from first day
-                        if hist['Close'].iloc[0] != 0:
-                            normalized = (hist['Close'] / hist['Close'].iloc[0] - 1) * 100
-                            
-                            fig.add_trace(go.Scatter(
-                                x=hist.index,
-                                y=normalized,
-                                mode='lines',
-                                name=symbol,
-                                line=dict(width=2),
-                                hovertemplate='<b>%{fullData.name}</b><br>' +
-                                            'Date: %{x}<br>' +
-                                            'Change: %{y:.2f}%<extra></extra>'
-                            ))
-                
-                fig.update_layout(
-                    title="Stock Performance Comparison (% Change from Start)",
-                    xaxis_title="Date",
-                    yaxis_title="Percentage Change (%)",
-                    height=500,
-                    hovermode='x unified'
+                fig = build_comparison_chart(
+                    tuple(normalized.columns),
+                    time_period,
+                    data_version,
+                    normalized.index.to_numpy(),
+                    normalized.to_numpy(dtype=np.float32)  # Display-only - halves the base64 payload
                 )
                 
                 st.plotly_chart(fig, use_container_width=True)
@@ -500,22 +982,10 @@ if selected_stocks:
         # Volume analysis
         st.header("📊 Trading Volume")
         
-        volume_data = []
-        for symbol, data in stock_data.items():
-            if not data['history'].empty:
-                hist = data['history']
-                avg_volume = hist['Volume'].tail(30).mean()  # 30-day average
-                recent_volume = hist['Volume'].iloc[-1]
-                
-                volume_data.append({
-                    'Stock': symbol,
-                    'Recent Volume': recent_volume,
-                    '30-Day Avg Volume': avg_volume,
-                    'Volume Ratio': recent_volume / avg_volume if avg_volume > 0 else 0
-                })
-        
-        if volume_data:
-            volume_df = pd.DataFrame(volume_data)
+        if not stock_stats.empty:
+            import plotly.express as px
+            
+            volume_df = stock_stats[['Recent Volume', '30-Day Avg Volume', 'Volume Ratio']].reset_index()
             
             fig = px.bar(
                 volume_df, 
@@ -534,26 +1004,35 @@ if selected_stocks:
         # Summary statistics
         st.header("📋 Summary Statistics")
         
-        summary_data = []
-        for symbol, data in stock_data.items():
-            if not data['history'].empty:
-                hist = data['history']
-                
-                summary_data.append({
-                    'Stock': symbol,
-                    'Company': data['info'].get('longName', symbol)[:30] + '...' if len(data['info'].get('longName', symbol)) > 30 else data['info'].get('longName', symbol),
-                    'Current Price': f"${data['current_price']:.2f}",
-                    'Daily Change': f"{data['change_pct']:+.2f}%",
-                    'High': f"${hist['High'].max():.2f}",
-                    'Low': f"${hist['Low'].min():.2f}",
-                    'Avg Volume': f"{hist['Volume'].mean():,.0f}",
-                    'Volatility': f"{hist['Close'].pct_change().std():.4f}",
-                    'Last Update': data['last_update'].strftime('%Y-%m-%d %H:%M')
-                })
-        
-        if summary_data:
-            summary_df = pd.DataFrame(summary_data)
-            st.dataframe(summary_df, use_container_width=True)
+        if not stock_stats.empty:
+            # Keep native dtypes - formatting happens client-side via column_config
+            quotes = stock_data.values()
+            summary_df = pd.DataFrame({
+                'Company': [company_names[symbol] for symbol in stock_stats.index],
+                'Currency': [currencies[symbol] or 'N/A' for symbol in stock_stats.index],
+                'Current Price': [data.current_price for data in quotes],
+                'Daily Change': [data.change_pct for data in quotes],
+                'High': stock_stats['High'],
+                'Low': stock_stats['Low'],
+                'Avg Volume': stock_stats['Avg Volume'],
+                'Volatility': stock_stats['Volatility'],
+                'Last Update': pd.to_datetime([data.last_update for data in quotes])
+            }, index=stock_stats.index).reset_index()
+            
+            st.dataframe(
+                summary_df,
+                use_container_width=True,
+                column_config={
+                    'Company': st.column_config.TextColumn(width="medium"),
+                    'Current Price': st.column_config.NumberColumn(format="%.2f"),
+                    'Daily Change': st.column_config.NumberColumn(format="%+.2f%%"),
+                    'High': st.column_config.NumberColumn(format="%.2f"),
+                    'Low': st.column_config.NumberColumn(format="%.2f"),
+                    'Avg Volume': st.column_config.NumberColumn(format="%d"),
+                    'Volatility': st.column_config.NumberColumn(format="%.4f"),
+                    'Last Update': st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm")
+                }
+            )
     
     else:
         st.error("No stock data available. Please check your selected stocks or try refreshing.")
@@ -561,6 +1040,10 @@ if selected_stocks:
 else:
     st.warning("Please select at least one stock symbol from the sidebar.")
 
+# Display market status
+market_status = market_status_from_indicators(selected_exchange, economic_data)
+market_status_placeholder.markdown(f"**Market Status:** {market_status}")
+
 # Footer with helpful information
 st.markdown("---")
 col1, col2, col3 = st.columns(3)
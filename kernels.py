@@ -0,0 +1,77 @@
+"""
+Numba kernels for the dashboard's per-symbol statistics.
+
+Kept out of Economics_dash.py because Streamlit re-executes the script on
+every rerun - decorating the kernels there would reload (or recompile)
+them on each widget change. Importing them from here compiles them once
+per process.
+"""
+import os
+
+import numpy as np
+
+# Persist compiled Numba kernels across runs (override to point at a mounted volume)
+os.environ.setdefault("NUMBA_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "stockdash-numba"))
+from numba import njit, prange
+
+
+# Explicit signature compiles at import (or loads from the disk cache) instead of on first use.
+# Keep NaN/inf semantics (no 'nnan'/'ninf') so gaps in the wide frames can be skipped
+@njit("float64[:](float64[:, ::1])", parallel=True, fastmath={'reassoc', 'contract', 'arcp'}, cache=True)
+def vol_kernel(close):
+    """
+    Std of daily log returns for every column of a (T, N) close matrix.
+    One-pass Welford update; NaN gaps are skipped so each return is taken
+    against the symbol's previous trading day.
+    """
+    T, N = close.shape
+    out = np.empty(N)
+    for j in prange(N):
+        mean = 0.0
+        m2 = 0.0
+        k = 0
+        prev = np.nan
+        for i in range(T):
+            c = close[i, j]
+            if not c > 0:  # Missing (NaN) or invalid price
+                continue
+            if prev > 0:
+                r = np.log(c / prev)
+                k += 1
+                d = r - mean
+                mean += d / k
+                m2 += d * (r - mean)
+            prev = c
+        out[j] = np.sqrt(m2 / (k - 1)) if k > 1 else np.nan
+    return out
+
+
+@njit("float64[:, :](float64[:, ::1])", parallel=True, cache=True)
+def volume_stats(volume):
+    """
+    (recent volume, average of the last 30 sessions, ratio) for every
+    column of a (T, N) volume matrix. Walks back from the end of each
+    column, skipping NaN gaps, so each symbol uses its own trading days.
+    """
+    window = 30
+    T, N = volume.shape
+    out = np.empty((N, 3))
+    for j in prange(N):
+        last = np.nan
+        total = 0.0
+        k = 0
+        for i in range(T - 1, -1, -1):
+            v = volume[i, j]
+            if np.isnan(v):
+                continue
+            if k == 0:
+                last = v
+            total += v
+            k += 1
+            if k == window:
+                break
+        avg = total / k if k > 0 else np.nan
+        out[j, 0] = last
+        out[j, 1] = avg
+        out[j, 2] = last / avg if avg > 0 else 0.0
+    return out
@@ -0,0 +1,22 @@
+"""
+Data containers shared by the dashboard.
+
+Kept out of Economics_dash.py because Streamlit re-executes the script as a
+fresh __main__ module on every rerun - classes defined there can't be
+pickled by st.cache_data once another session has rerun.
+"""
+from dataclasses import dataclass
+
+import pandas as pd
+
+
+@dataclass(slots=True, frozen=True)
+class SymbolData:
+    """
+    Price data for one stock, as returned by get_stock_data
+    """
+    history: pd.DataFrame
+    current_price: float
+    change: float
+    change_pct: float
+    last_update: pd.Timestamp